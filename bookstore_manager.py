@@ -1,101 +1,184 @@
 import sqlite3
+import csv
 import re
-from typing import Optional, Tuple, List, Dict, Any
+import sys
+from typing import Optional, Tuple, List, Set, Any, TextIO
 
 
 DB_NAME = "bookstore.db"
 DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+_DATE_RE = re.compile(DATE_PATTERN)
+
+# 銷售報表每累積多少筆就寫出一次
+_REPORT_FLUSH_ROWS = 256
+
+# 執行期使用的 SQL 集中定義為常數，確保每次都命中連線的 prepared statement 快取
+_SQL_CHECK_MEMBER = "SELECT 1 FROM member WHERE mid = ?"
+_SQL_CHECK_BOOK = "SELECT 1 FROM book WHERE bid = ?"
+_SQL_BOOK_STOCK = "SELECT bstock FROM book WHERE bid = ?"
+_SQL_BOOK_PRICE = "SELECT bprice FROM book WHERE bid = ?"
+_SQL_BOOK_INFO = """
+    SELECT EXISTS(SELECT 1 FROM member WHERE mid = ?) AS m_ok
+    FROM book b
+    WHERE b.bid = ?
+"""
+_SQL_UPDATE_STOCK = "UPDATE book SET bstock = bstock - ? WHERE bid = ? AND bstock >= ?"
+_SQL_INSERT_SALE = """
+    INSERT INTO sale (sdate, mid, bid, sqty, sdiscount, stotal)
+    SELECT ?, ?, ?, ?, ?, b.bprice * ? - ?
+    FROM book b
+    WHERE b.bid = ? AND EXISTS(SELECT 1 FROM member WHERE mid = ?)
+    RETURNING stotal
+"""
+_SQL_UPDATE_SALE = """
+    UPDATE sale
+    SET sdiscount = ?,
+        stotal = (SELECT b.bprice FROM book b WHERE b.bid = sale.bid) * sale.sqty - ?
+    WHERE sid = ?
+    RETURNING stotal
+"""
+_SQL_DELETE_SALE = "DELETE FROM sale WHERE sid = ?"
+_SQL_REPORT = """
+    SELECT s.sid, s.sdate, m.mname, b.btitle, b.bprice, s.sqty, s.sdiscount, s.stotal
+    FROM sale s
+    JOIN member m ON s.mid = m.mid
+    JOIN book b ON s.bid = b.bid
+    ORDER BY s.sid
+"""
+_SQL_SALES_LIST = """
+    SELECT s.sid, s.sdate, m.mname
+    FROM sale s
+    JOIN member m ON s.mid = m.mid
+    ORDER BY s.sid
+"""
 
 def connect_db() -> sqlite3.Connection:
     """建立並返回 SQLite 資料庫連線"""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
+    conn = sqlite3.connect(DB_NAME, cached_statements=256)
+    # 交易改由程式以 BEGIN IMMEDIATE / COMMIT / ROLLBACK 明確控制
+    conn.isolation_level = None
+    # PRAGMA 設定不會保存在資料庫檔案中，每次連線都需重新套用
+    if DB_NAME != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
 def initialize_db(conn: sqlite3.Connection) -> None:
-    """檢查並建立資料表，插入初始資料"""
-    cursor = conn.cursor()
+    """建立資料表與索引，資料庫為空時插入初始資料"""
     try:
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sale'")
-        if not cursor.fetchone():
-            cursor.executescript("""
-                CREATE TABLE IF NOT EXISTS member (
-                    mid TEXT PRIMARY KEY,
-                    mname TEXT NOT NULL,
-                    mphone TEXT NOT NULL,
-                    memail TEXT
-                );
-
-                CREATE TABLE IF NOT EXISTS book (
-                    bid TEXT PRIMARY KEY,
-                    btitle TEXT NOT NULL,
-                    bprice INTEGER NOT NULL,
-                    bstock INTEGER NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS sale (
-                    sid INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sdate TEXT NOT NULL,
-                    mid TEXT NOT NULL,
-                    bid TEXT NOT NULL,
-                    sqty INTEGER NOT NULL,
-                    sdiscount INTEGER NOT NULL,
-                    stotal INTEGER NOT NULL
-                );
-
-                INSERT INTO member VALUES ('M001', 'Alice', '0912-345678', 'alice@example.com');
-                INSERT INTO member VALUES ('M002', 'Bob', '0923-456789', 'bob@example.com');
-                INSERT INTO member VALUES ('M003', 'Cathy', '0934-567890', 'cathy@example.com');
-
-                INSERT INTO book VALUES ('B001', 'Python Programming', 600, 50);
-                INSERT INTO book VALUES ('B002', 'Data Science Basics', 800, 30);
-                INSERT INTO book VALUES ('B003', 'Machine Learning Guide', 1200, 20);
-
-                INSERT INTO sale (sdate, mid, bid, sqty, sdiscount, stotal) VALUES ('2024-01-15', 'M001', 'B001', 2, 100, 1100);
-                INSERT INTO sale (sdate, mid, bid, sqty, sdiscount, stotal) VALUES ('2024-01-16', 'M002', 'B002', 1, 50, 750);
-                INSERT INTO sale (sdate, mid, bid, sqty, sdiscount, stotal) VALUES ('2024-01-17', 'M001', 'B003', 3, 200, 3400);
-                INSERT INTO sale (sdate, mid, bid, sqty, sdiscount, stotal) VALUES ('2024-01-18', 'M003', 'B001', 1, 0, 600);
-            """)
-            conn.commit()
+        # DDL 皆為 IF NOT EXISTS，每次啟動直接執行，也能補齊只建立了部分資料表的資料庫
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS member (
+                mid TEXT PRIMARY KEY,
+                mname TEXT NOT NULL,
+                mphone TEXT NOT NULL,
+                memail TEXT
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS book (
+                bid TEXT PRIMARY KEY,
+                btitle TEXT NOT NULL,
+                bprice INTEGER NOT NULL,
+                bstock INTEGER NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS sale (
+                sid INTEGER PRIMARY KEY AUTOINCREMENT,
+                sdate TEXT NOT NULL,
+                mid TEXT NOT NULL,
+                bid TEXT NOT NULL,
+                sqty INTEGER NOT NULL,
+                sdiscount INTEGER NOT NULL,
+                stotal INTEGER NOT NULL,
+                FOREIGN KEY (mid) REFERENCES member(mid),
+                FOREIGN KEY (bid) REFERENCES book(bid)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_sale_mid ON sale(mid);
+            CREATE INDEX IF NOT EXISTS idx_sale_bid ON sale(bid);
+            CREATE INDEX IF NOT EXISTS idx_sale_sdate ON sale(sdate);
+        """)
+        if conn.execute("SELECT 1 FROM member LIMIT 1").fetchone() is None:
+            # 初始資料以 executemany 在單一交易中寫入
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO member VALUES (?, ?, ?, ?)", [
+                ('M001', 'Alice', '0912-345678', 'alice@example.com'),
+                ('M002', 'Bob', '0923-456789', 'bob@example.com'),
+                ('M003', 'Cathy', '0934-567890', 'cathy@example.com'),
+            ])
+            conn.executemany("INSERT INTO book VALUES (?, ?, ?, ?)", [
+                ('B001', 'Python Programming', 600, 50),
+                ('B002', 'Data Science Basics', 800, 30),
+                ('B003', 'Machine Learning Guide', 1200, 20),
+            ])
+            conn.executemany(
+                "INSERT INTO sale (sdate, mid, bid, sqty, sdiscount, stotal) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    ('2024-01-15', 'M001', 'B001', 2, 100, 1100),
+                    ('2024-01-16', 'M002', 'B002', 1, 50, 750),
+                    ('2024-01-17', 'M001', 'B003', 3, 200, 3400),
+                    ('2024-01-18', 'M003', 'B001', 1, 0, 600),
+                ]
+            )
+            conn.execute("COMMIT")
+            conn.execute("ANALYZE")
     except sqlite3.Error as e:
         print(f"資料庫初始化錯誤：{e}")
-        conn.rollback()
+    finally:
+        # 任何例外都不可讓交易與寫入鎖留在連線上
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
 
 def validate_date(date: str) -> bool:
     """驗證日期格式是否為 YYYY-MM-DD"""
-    return bool(re.match(DATE_PATTERN, date))
+    return _DATE_RE.match(date) is not None
+
+def read_int(prompt: str, min_val: int, range_error: str, type_error: str) -> int:
+    """讀取不小於 min_val 的整數，輸入無效時顯示錯誤並重新輸入"""
+    while True:
+        s = input(prompt).strip()
+        # 先以字元檢查判斷是否為整數，避免以例外處理無效輸入
+        digits = s[1:] if s[:1] in ("+", "-") else s
+        if not digits.isdecimal():
+            print(type_error)
+            continue
+        value = int(s)
+        if value >= min_val:
+            return value
+        print(range_error)
 
 def check_member_exists(conn: sqlite3.Connection, mid: str) -> bool:
     """檢查會員編號是否存在"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM member WHERE mid = ?", (mid,))
-    return cursor.fetchone() is not None
+    return conn.execute(_SQL_CHECK_MEMBER, (mid,)).fetchone() is not None
 
 def check_book_exists(conn: sqlite3.Connection, bid: str) -> bool:
     """檢查書籍編號是否存在"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM book WHERE bid = ?", (bid,))
-    return cursor.fetchone() is not None
+    return conn.execute(_SQL_CHECK_BOOK, (bid,)).fetchone() is not None
 
 def check_book_stock(conn: sqlite3.Connection, bid: str, qty: int) -> Tuple[bool, int]:
     """檢查書籍庫存是否足夠"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT bstock FROM book WHERE bid = ?", (bid,))
-    row = cursor.fetchone()
-    if row and row['bstock'] >= qty:
-        return True, row['bstock']
-    return False, row['bstock'] if row else 0
+    (stock,) = conn.execute(_SQL_BOOK_STOCK, (bid,)).fetchone() or (0,)
+    return stock >= qty, stock
 
 def get_book_price(conn: sqlite3.Connection, bid: str) -> int:
     """取得書籍單價"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT bprice FROM book WHERE bid = ?", (bid,))
-    row = cursor.fetchone()
-    return row['bprice'] if row else 0
+    (price,) = conn.execute(_SQL_BOOK_PRICE, (bid,)).fetchone() or (0,)
+    return price
 
-def add_sale(conn: sqlite3.Connection) -> None:
-    """新增銷售記錄"""
-    cursor = conn.cursor()
+def add_sale(
+    conn: sqlite3.Connection,
+    known_books: Optional[Set[str]] = None,
+    known_members: Optional[Set[str]] = None
+) -> None:
+    """新增銷售記錄；傳入 known_books/known_members 時，已確認存在的編號可略過驗證查詢"""
+    if known_books is None:
+        known_books = set()
+    if known_members is None:
+        known_members = set()
     while True:
         sdate = input("請輸入銷售日期 (YYYY-MM-DD)：")
         if validate_date(sdate):
@@ -103,97 +186,113 @@ def add_sale(conn: sqlite3.Connection) -> None:
         print("=> 錯誤：日期格式無效，請使用 YYYY-MM-DD 格式")
     mid = input("請輸入會員編號：")
     bid = input("請輸入書籍編號：")
-    valid_ids = check_member_exists(conn, mid) and check_book_exists(conn, bid)
-    sqty = None
-    while sqty is None:
-        try:
-            sqty = int(input("請輸入購買數量："))
-            if sqty <= 0:
-                print("=> 錯誤：數量必須為正整數，請重新輸入")
-                sqty = None
-        except ValueError:
-            print("=> 錯誤：數量或折扣必須為整數，請重新輸入")
-    sdiscount = None
-    while sdiscount is None:
-        try:
-            sdiscount = int(input("請輸入折扣金額："))
-            if sdiscount < 0:
-                print("=> 錯誤：折扣金額不能為負數，請重新輸入")
-                sdiscount = None
-        except ValueError:
-            print("=> 錯誤：數量或折扣必須為整數，請重新輸入")
-    if not valid_ids:
-        print("=> 錯誤：會員編號或書籍編號無效")
-        return
-    stock_ok, current_stock = check_book_stock(conn, bid, sqty)
-    if not stock_ok:
-        print(f"=> 錯誤：書籍庫存不足 (現有庫存: {current_stock})")
-        return
-    bprice = get_book_price(conn, bid)
-    stotal = bprice * sqty - sdiscount
+    sqty = read_int(
+        "請輸入購買數量：", 1,
+        "=> 錯誤：數量必須為正整數，請重新輸入",
+        "=> 錯誤：數量或折扣必須為整數，請重新輸入"
+    )
+    sdiscount = read_int(
+        "請輸入折扣金額：", 0,
+        "=> 錯誤：折扣金額不能為負數，請重新輸入",
+        "=> 錯誤：數量或折扣必須為整數，請重新輸入"
+    )
+    if bid not in known_books or mid not in known_members:
+        # 快取未命中時，一次查詢確認書籍與會員是否存在，取代逐一呼叫 check_*
+        (m_ok,) = conn.execute(_SQL_BOOK_INFO, (mid, bid)).fetchone() or (False,)
+        if not m_ok:
+            print("=> 錯誤：會員編號或書籍編號無效")
+            return
+        known_books.add(bid)
+        known_members.add(mid)
     try:
-        cursor.execute(
-            "INSERT INTO sale (sdate, mid, bid, sqty, sdiscount, stotal) VALUES (?, ?, ?, ?, ?, ?)",
-            (sdate, mid, bid, sqty, sdiscount, stotal)
-        )
-        cursor.execute(
-            "UPDATE book SET bstock = bstock - ? WHERE bid = ?",
-            (sqty, bid)
-        )
-        conn.commit()
+        # 一開始就取得寫入鎖，遇到競爭時由 busy_timeout 等待而非直接失敗
+        conn.execute("BEGIN IMMEDIATE")
+        # 以 bstock >= ? 作為條件扣庫存，檢查與扣減在同一敘述內完成
+        cursor = conn.execute(_SQL_UPDATE_STOCK, (sqty, bid, sqty))
+        if cursor.rowcount == 0:
+            conn.execute("ROLLBACK")
+            row = conn.execute(_SQL_BOOK_STOCK, (bid,)).fetchone()
+            if row is None:
+                # 快取中的書籍已在程式外被刪除
+                known_books.discard(bid)
+                print("=> 錯誤：會員編號或書籍編號無效")
+            else:
+                print(f"=> 錯誤：書籍庫存不足 (現有庫存: {row[0]})")
+            return
+        # 總額由 SQL 依書價計算，並以 RETURNING 取回實際寫入的值；
+        # 會員不存在時不會插入任何資料列，舊版無外鍵的資料表也能擋下
+        row = conn.execute(
+            _SQL_INSERT_SALE, (sdate, mid, bid, sqty, sdiscount, sqty, sdiscount, bid, mid)
+        ).fetchone()
+        if row is None:
+            # 快取中的會員已在程式外被刪除，連同已扣的庫存一併回滾
+            conn.execute("ROLLBACK")
+            known_members.discard(mid)
+            print("=> 錯誤：會員編號或書籍編號無效")
+            return
+        (stotal,) = row
+        conn.execute("COMMIT")
         print(f"=> 銷售記錄已新增！(銷售總額: {stotal:,})")
     except sqlite3.Error as e:
-        conn.rollback()
         print(f"=> 錯誤：{e}")
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
 
 def print_sale_report(conn: sqlite3.Connection) -> None:
     """查詢並顯示所有銷售報表"""
+    # 報表以欄位名稱取值，僅在此游標使用 sqlite3.Row
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.sid, s.sdate, m.mname, b.btitle, b.bprice, s.sqty, s.sdiscount, s.stotal
-        FROM sale s
-        JOIN member m ON s.mid = m.mid
-        JOIN book b ON s.bid = b.bid
-        ORDER BY s.sid
-    """)
-    sales = cursor.fetchall()
-    print("\n==================== 銷售報表 ====================")
-    for i, sale in enumerate(sales, 1):
-        print(f"銷售 #{i}")
-        print(f"銷售編號: {sale['sid']}")
-        print(f"銷售日期: {sale['sdate']}")
-        print(f"會員姓名: {sale['mname']}")
-        print(f"書籍標題: {sale['btitle']}")
-        print("--------------------------------------------------")
-        print("單價\t數量\t折扣\t小計")
-        print("--------------------------------------------------")
-        print(f"{sale['bprice']:,}\t{sale['sqty']}\t{sale['sdiscount']:,}\t{sale['stotal']:,}")
-        print("--------------------------------------------------")
-        print(f"銷售總額: {sale['stotal']:,}")
-        print("==================================================")
-        print()
-
-def get_sales_list(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    cursor.row_factory = sqlite3.Row
+    cursor.execute(_SQL_REPORT)
+    # 直接迭代游標逐列處理，輸出先累積在緩衝區，每 _REPORT_FLUSH_ROWS 筆寫出一次
+    line = "--------------------------------------------------\n"
+    header = line + "單價\t數量\t折扣\t小計\n" + line
+    footer = "==================================================\n\n"
+    buf = ["\n==================== 銷售報表 ====================\n"]
+    append = buf.append
+    for i, sale in enumerate(cursor, 1):
+        append(
+            f"銷售 #{i}\n"
+            f"銷售編號: {sale['sid']}\n"
+            f"銷售日期: {sale['sdate']}\n"
+            f"會員姓名: {sale['mname']}\n"
+            f"書籍標題: {sale['btitle']}\n"
+        )
+        append(header)
+        append(f"{sale['bprice']:,}\t{sale['sqty']}\t{sale['sdiscount']:,}\t{sale['stotal']:,}\n")
+        append(line)
+        append(f"銷售總額: {sale['stotal']:,}\n")
+        append(footer)
+        if i % _REPORT_FLUSH_ROWS == 0:
+            sys.stdout.write("".join(buf))
+            buf.clear()
+    sys.stdout.write("".join(buf))
+
+def export_sales_tsv(conn: sqlite3.Connection, file: TextIO) -> None:
+    """將銷售報表以 TSV 格式匯出，數值不做千分位格式化"""
+    cursor = conn.execute(_SQL_REPORT)
+    writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+    writer.writerow([col[0] for col in cursor.description])
+    writer.writerows(cursor)
+
+def get_sales_list(conn: sqlite3.Connection) -> List[sqlite3.Row]:
     """取得銷售記錄列表"""
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT s.sid, s.sdate, m.mname
-        FROM sale s
-        JOIN member m ON s.mid = m.mid
-        ORDER BY s.sid
-    """)
-    return [dict(row) for row in cursor.fetchall()]
-
-def display_sales_list(sales: List[Dict[str, Any]]) -> None:
+    cursor.row_factory = sqlite3.Row
+    return cursor.execute(_SQL_SALES_LIST).fetchall()
+
+def display_sales_list(sales: List[sqlite3.Row]) -> None:
     """顯示銷售記錄列表"""
-    print("\n======== 銷售記錄列表 ========")
+    buf = ["\n======== 銷售記錄列表 ========\n"]
+    append = buf.append
     for i, sale in enumerate(sales, 1):
-        print(f"{i}. 銷售編號: {sale['sid']} - 會員: {sale['mname']} - 日期: {sale['sdate']}")
-    print("================================")
+        append(f"{i}. 銷售編號: {sale['sid']} - 會員: {sale['mname']} - 日期: {sale['sdate']}\n")
+    append("================================\n")
+    sys.stdout.write("".join(buf))
 
 def update_sale(conn: sqlite3.Connection) -> None:
     """更新銷售記錄"""
-    cursor = conn.cursor()
     sales = get_sales_list(conn)
     if not sales:
         print("=> 目前沒有銷售記錄")
@@ -209,40 +308,36 @@ def update_sale(conn: sqlite3.Connection) -> None:
                 print("=> 錯誤：請輸入有效的數字")
                 continue
             sid = sales[idx]['sid']
-            cursor.execute("""
-                SELECT s.*, b.bprice
-                FROM sale s
-                JOIN book b ON s.bid = b.bid
-                WHERE s.sid = ?
-            """, (sid,))
-            sale = cursor.fetchone()
-            while True:
-                try:
-                    new_discount = int(input("請輸入新的折扣金額："))
-                    if new_discount < 0:
-                        print("=> 錯誤：折扣金額不能為負數，請重新輸入")
-                        continue
-                    break
-                except ValueError:
-                    print("=> 錯誤：折扣金額必須為整數，請重新輸入")
-            new_total = sale['bprice'] * sale['sqty'] - new_discount
-            cursor.execute(
-                "UPDATE sale SET sdiscount = ?, stotal = ? WHERE sid = ?",
-                (new_discount, new_total, sid)
+            new_discount = read_int(
+                "請輸入新的折扣金額：", 0,
+                "=> 錯誤：折扣金額不能為負數，請重新輸入",
+                "=> 錯誤：折扣金額必須為整數，請重新輸入"
             )
-            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            # 由 SQL 直接以書價重新計算總額並回傳，不需事先查詢
+            row = conn.execute(
+                _SQL_UPDATE_SALE, (new_discount, new_discount, sid)
+            ).fetchone()
+            if row is None:
+                # 列表顯示後該筆記錄已被刪除
+                conn.execute("ROLLBACK")
+                print(f"=> 錯誤：找不到銷售編號 {sid}")
+                break
+            (new_total,) = row
+            conn.execute("COMMIT")
             print(f"=> 銷售編號 {sid} 已更新！(銷售總額: {new_total:,})")
             break
         except ValueError:
             print("=> 錯誤：請輸入有效的數字")
         except sqlite3.Error as e:
-            conn.rollback()
             print(f"=> 錯誤：{e}")
             break
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
 
 def delete_sale(conn: sqlite3.Connection) -> None:
     """刪除銷售記錄"""
-    cursor = conn.cursor()
     sales = get_sales_list(conn)
     if not sales:
         print("=> 目前沒有銷售記錄")
@@ -258,12 +353,59 @@ def delete_sale(conn: sqlite3.Connection) -> None:
                 print("=> 錯誤：請輸入有效的數字")
                 continue
             sid = sales[idx]['sid']
-            cursor.execute("DELETE FROM sale WHERE sid = ?", (sid,))
-            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(_SQL_DELETE_SALE, (sid,))
+            conn.execute("COMMIT")
             print(f"=> 銷售編號 {sid} 已刪除")
             break
         except ValueError:
             print("=> 錯誤：請輸入有效的數字")
+        except sqlite3.Error as e:
+            print(f"=> 錯誤：{e}")
+            break
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+class BookstoreDB:
+    """持有單一資料庫連線，所有操作共用此連線而不重複開啟"""
+
+    def __init__(self) -> None:
+        self._conn = connect_db()
+        initialize_db(self._conn)
+        # 已確認存在的書籍與會員編號，僅屬於此連線
+        self._known_books: Set[str] = set()
+        self._known_members: Set[str] = set()
+
+    def __enter__(self) -> "BookstoreDB":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """關閉資料庫連線"""
+        self._conn.close()
+
+    def add_sale(self) -> None:
+        """新增銷售記錄"""
+        add_sale(self._conn, self._known_books, self._known_members)
+
+    def print_sale_report(self) -> None:
+        """查詢並顯示所有銷售報表"""
+        print_sale_report(self._conn)
+
+    def export_sales_tsv(self, file: TextIO) -> None:
+        """將銷售報表以 TSV 格式匯出"""
+        export_sales_tsv(self._conn, file)
+
+    def update_sale(self) -> None:
+        """更新銷售記錄"""
+        update_sale(self._conn)
+
+    def delete_sale(self) -> None:
+        """刪除銷售記錄"""
+        delete_sale(self._conn)
 
 def show_menu() -> str:
     """顯示選單並取得使用者選擇"""
@@ -278,20 +420,19 @@ def show_menu() -> str:
 
 def main() -> None:
     """程式主流程"""
-    with connect_db() as conn:
-        initialize_db(conn)
+    with BookstoreDB() as db:
         while True:
             choice = show_menu()
             if not choice:
                 break
             if choice == "1":
-                add_sale(conn)
+                db.add_sale()
             elif choice == "2":
-                print_sale_report(conn)
+                db.print_sale_report()
             elif choice == "3":
-                update_sale(conn)
+                db.update_sale()
             elif choice == "4":
-                delete_sale(conn)
+                db.delete_sale()
             elif choice == "5":
                 break
             else: